@@ -1,42 +1,86 @@
 """
 LogBuddy - A comprehensive logging and analytics service
-Using FastAPI, pandas, loguru, requests, and SQLAlchemy
+Using FastAPI, loguru, requests, and SQLAlchemy
 """
 
 from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
-from fastapi.responses import JSONResponse
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Float, Text
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
+from sqlalchemy import event, func, insert, select, Column, Index, Integer, String, DateTime, Float, Text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel
-import pandas as pd
-import requests
+from pydantic import BaseModel, ConfigDict
+import httpx
+from cachetools import TTLCache
 from loguru import logger
-import json
+import csv
+import io
+import orjson
 import os
+import threading
+import time
 
-# Configure Loguru logger
-logger.add("logs/app.log", rotation="1 MB", retention="10 days", level="INFO")
-logger.add("logs/error.log", rotation="1 MB", retention="10 days", level="ERROR")
+# Configure Loguru logger (enqueue=True hands records to a background
+# thread so request handlers never block on disk writes or rotation).
+# The directory must exist before the sinks are added, and remove() keeps
+# reload mode from stacking duplicate sinks on top of the defaults.
+os.makedirs("logs", exist_ok=True)
+logger.remove()
+logger.add("logs/app.log", rotation="1 MB", retention="10 days", level="INFO", enqueue=True)
+logger.add("logs/error.log", rotation="1 MB", retention="10 days", level="ERROR", enqueue=True)
 
 # Database setup
-SQLALCHEMY_DATABASE_URL = "sqlite:///./logbuddy.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./logbuddy.db"
+engine = create_async_engine(
+    SQLALCHEMY_DATABASE_URL,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=20,
+    max_overflow=10,
+    pool_timeout=30,
+    pool_pre_ping=True,
+    pool_recycle=3600,
+)
+
+@event.listens_for(engine.sync_engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune SQLite for a write-heavy log workload with occasional scans"""
+    cursor = dbapi_connection.cursor()
+    # WAL: readers don't block the single writer, and commits group-batch
+    cursor.execute("PRAGMA journal_mode=WAL")
+    # NORMAL is durable through app crashes under WAL and skips most fsyncs
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    # 64 MB page cache (negative value = KiB)
+    cursor.execute("PRAGMA cache_size=-65536")
+    # mmap the first 256 MB so scans skip a read() syscall per page
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+SessionLocal = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
 Base = declarative_base()
 
 # Database Models
 class LogEntry(Base):
     __tablename__ = "log_entries"
-    
+    __table_args__ = (
+        Index("ix_log_level_ts", "level", "timestamp"),
+        Index("ix_log_source_ts", "source", "timestamp"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+    # Integer epoch mirror of timestamp: int64 comparisons instead of the
+    # lexicographic text compares SQLite does on DateTime columns
+    timestamp_epoch = Column(Integer, default=lambda: int(datetime.utcnow().timestamp()), index=True)
     level = Column(String(20))
     message = Column(Text)
     source = Column(String(100))
     user_id = Column(String(50), nullable=True)
+    # Promoted from the webhook JSON payload so type filters hit an index
+    # instead of json_extract over a full scan
+    webhook_type = Column(String(50), index=True, nullable=True)
     extra_data = Column(Text, nullable=True)  # JSON string
 
 class APICall(Base):
@@ -59,6 +103,8 @@ class LogEntryCreate(BaseModel):
     extra_data: Optional[Dict[str, Any]] = None
 
 class LogEntryResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     timestamp: datetime
     level: str
@@ -78,34 +124,57 @@ class ExternalAPIResponse(BaseModel):
     data: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# Shared async HTTP client: keeps a pooled connection to the upstream API
+# and yields the event loop during external I/O instead of blocking it
+_HTTP = httpx.AsyncClient(
+    timeout=httpx.Timeout(10.0, connect=3.0),
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+    http2=True,
+)
+
+# Weather responses are reusable for minutes, so cache them per city and
+# skip the external round-trip entirely on repeat queries
+_weather_cache: TTLCache = TTLCache(maxsize=1024, ttl=600)
+_weather_cache_lock = threading.Lock()
+
+# Analytics is read-mostly but costs several aggregate queries; cache the
+# latest report briefly and drop it whenever a write lands
+_ANALYTICS_TTL = 15.0
+_analytics_cache: Optional[tuple] = None  # (monotonic timestamp, response)
+_analytics_cache_lock = threading.Lock()
+
+def _invalidate_analytics_cache():
+    global _analytics_cache
+    with _analytics_cache_lock:
+        _analytics_cache = None
 
 # FastAPI app
 app = FastAPI(
     title="LogBuddy",
     description="A comprehensive logging and analytics service",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize the application"""
     logger.info("LogBuddy application starting up...")
-    os.makedirs("logs", exist_ok=True)
+    # Create tables
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Clean up on shutdown"""
     logger.info("LogBuddy application shutting down...")
+    await _HTTP.aclose()
+    await engine.dispose()
 
 @app.get("/")
 async def root():
@@ -114,25 +183,31 @@ async def root():
     return {"message": "Welcome to LogBuddy - Your logging companion!"}
 
 @app.post("/logs", response_model=LogEntryResponse)
-async def create_log_entry(log_entry: LogEntryCreate, db: Session = Depends(get_db)):
+async def create_log_entry(log_entry: LogEntryCreate, db: AsyncSession = Depends(get_db)):
     """Create a new log entry"""
     try:
         # Log the incoming request
         logger.info(f"Creating log entry: {log_entry.level} - {log_entry.message}")
         
         # Create database entry
+        now = datetime.utcnow()
         db_log = LogEntry(
+            timestamp=now,
+            timestamp_epoch=int(now.timestamp()),
             level=log_entry.level,
             message=log_entry.message,
             source=log_entry.source,
             user_id=log_entry.user_id,
-            extra_data=json.dumps(log_entry.extra_data) if log_entry.extra_data else None
+            extra_data=orjson.dumps(log_entry.extra_data).decode() if log_entry.extra_data else None
         )
         
         db.add(db_log)
-        db.commit()
-        db.refresh(db_log)
-        
+        # flush() populates db_log.id from lastrowid without the SELECT a
+        # refresh() would issue; every other field is already set in memory
+        await db.flush()
+        await db.commit()
+        _invalidate_analytics_cache()
+
         logger.success(f"Log entry created with ID: {db_log.id}")
         return db_log
         
@@ -140,24 +215,69 @@ async def create_log_entry(log_entry: LogEntryCreate, db: Session = Depends(get_
         logger.error(f"Error creating log entry: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to create log entry")
 
+@app.post("/logs/bulk")
+async def create_log_entries_bulk(entries: List[LogEntryCreate], db: AsyncSession = Depends(get_db)):
+    """Create a batch of log entries in a single transaction"""
+    try:
+        logger.info(f"Creating {len(entries)} log entries in bulk")
+
+        # One executemany INSERT so the fsync cost amortizes over the batch
+        now = datetime.utcnow()
+        mappings = [{
+            "timestamp": now,
+            "timestamp_epoch": int(now.timestamp()),
+            "level": entry.level,
+            "message": entry.message,
+            "source": entry.source,
+            "user_id": entry.user_id,
+            "extra_data": orjson.dumps(entry.extra_data).decode() if entry.extra_data else None
+        } for entry in entries]
+
+        if mappings:
+            await db.execute(insert(LogEntry), mappings)
+            await db.commit()
+            _invalidate_analytics_cache()
+
+        logger.success(f"Bulk insert of {len(mappings)} log entries committed")
+        return {"inserted": len(mappings)}
+
+    except Exception as e:
+        logger.error(f"Error bulk-creating log entries: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to create log entries")
+
 @app.get("/logs", response_model=List[LogEntryResponse])
 async def get_logs(
     skip: int = 0,
     limit: int = 100,
     level: Optional[str] = None,
     source: Optional[str] = None,
-    db: Session = Depends(get_db)
+    webhook_type: Optional[str] = None,
+    before: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db)
 ):
     """Retrieve log entries with optional filtering"""
     try:
-        query = db.query(LogEntry)
-        
+        stmt = select(LogEntry)
+
         if level:
-            query = query.filter(LogEntry.level == level)
+            stmt = stmt.where(LogEntry.level == level)
         if source:
-            query = query.filter(LogEntry.source == source)
-            
-        logs = query.offset(skip).limit(limit).all()
+            stmt = stmt.where(LogEntry.source == source)
+        if webhook_type:
+            stmt = stmt.where(LogEntry.webhook_type == webhook_type)
+
+        # Order newest-first so the (filter, timestamp) indexes serve the sort
+        stmt = stmt.order_by(LogEntry.timestamp.desc())
+
+        if before is not None:
+            # Keyset pagination: pass the last timestamp of the previous page
+            # instead of a deep OFFSET, which still walks the skipped rows
+            stmt = stmt.where(LogEntry.timestamp < before)
+        else:
+            stmt = stmt.offset(skip)
+
+        result = await db.execute(stmt.limit(limit))
+        logs = result.scalars().all()
         logger.info(f"Retrieved {len(logs)} log entries")
         return logs
         
@@ -166,52 +286,65 @@ async def get_logs(
         raise HTTPException(status_code=500, detail="Failed to retrieve logs")
 
 @app.get("/analytics", response_model=AnalyticsResponse)
-async def get_analytics(db: Session = Depends(get_db)):
-    """Get analytics using pandas for data analysis"""
+async def get_analytics(db: AsyncSession = Depends(get_db)):
+    """Get analytics by aggregating directly in SQL"""
+    global _analytics_cache
     try:
+        with _analytics_cache_lock:
+            cached = _analytics_cache
+        if cached is not None and time.monotonic() - cached[0] < _ANALYTICS_TTL:
+            return cached[1]
+
         logger.info("Generating analytics report...")
-        
-        # Fetch all logs into a pandas DataFrame
-        logs = db.query(LogEntry).all()
-        
-        if not logs:
+
+        # Aggregate in the database instead of materializing every row
+        total_logs = (await db.execute(select(func.count(LogEntry.id)))).scalar()
+
+        if not total_logs:
             return AnalyticsResponse(
                 total_logs=0,
                 logs_by_level={},
                 logs_by_source={},
                 recent_activity=[]
             )
-        
-        # Convert to pandas DataFrame for analysis
-        df = pd.DataFrame([{
+
+        logs_by_level = dict((await db.execute(
+            select(LogEntry.level, func.count()).group_by(LogEntry.level)
+        )).all())
+        logs_by_source = dict((await db.execute(
+            select(LogEntry.source, func.count()).group_by(LogEntry.source)
+        )).all())
+
+        # Get recent activity (last 24 hours) via an indexed range scan on
+        # the integer epoch column
+        cutoff_epoch = int((datetime.utcnow() - timedelta(hours=24)).timestamp())
+        # Project only the displayed columns; skips fetching extra_data
+        recent_logs = (await db.execute(
+            select(LogEntry.id, LogEntry.timestamp, LogEntry.level,
+                   LogEntry.source, LogEntry.message)
+            .where(LogEntry.timestamp_epoch >= cutoff_epoch)
+            .order_by(LogEntry.timestamp_epoch.desc())
+            .limit(10)
+        )).all()
+        recent_activity = [{
             'id': log.id,
-            'timestamp': log.timestamp,
+            'timestamp': log.timestamp.isoformat(),
             'level': log.level,
             'source': log.source,
             'message': log.message
-        } for log in logs])
-        
-        # Analyze data using pandas
-        total_logs = len(df)
-        logs_by_level = df['level'].value_counts().to_dict()
-        logs_by_source = df['source'].value_counts().to_dict()
-        
-        # Get recent activity (last 24 hours)
-        recent_df = df[df['timestamp'] >= datetime.utcnow() - timedelta(hours=24)]
-        recent_activity = recent_df.tail(10).to_dict('records')
-        
-        # Convert timestamps to strings for JSON serialization
-        for activity in recent_activity:
-            activity['timestamp'] = activity['timestamp'].isoformat()
-        
+        } for log in recent_logs]
+
         logger.success("Analytics report generated successfully")
-        
-        return AnalyticsResponse(
+
+        report = AnalyticsResponse(
             total_logs=total_logs,
             logs_by_level=logs_by_level,
             logs_by_source=logs_by_source,
             recent_activity=recent_activity
         )
+        with _analytics_cache_lock:
+            _analytics_cache = (time.monotonic(), report)
+        return report
         
     except Exception as e:
         logger.error(f"Error generating analytics: {str(e)}")
@@ -221,8 +354,15 @@ async def get_analytics(db: Session = Depends(get_db)):
 async def get_weather_data(city: str = "London") -> ExternalAPIResponse:
     """Fetch weather data from external API using requests"""
     try:
+        cache_key = city.lower()
+        with _weather_cache_lock:
+            cached = _weather_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Weather cache hit for {city}")
+            return cached
+
         logger.info(f"Fetching weather data for {city}")
-        
+
         # Using OpenWeatherMap API (free tier)
         # Note: In production, you would use an actual API key
         url = f"https://api.openweathermap.org/data/2.5/weather"
@@ -232,14 +372,18 @@ async def get_weather_data(city: str = "London") -> ExternalAPIResponse:
             "units": "metric"
         }
         
-        # Make request using requests library
-        response = requests.get(url, params=params, timeout=10)
+        # Await on the pooled client so the worker serves other requests
+        # during the external round-trip
+        response = await _HTTP.get(url, params=params)
         
         if response.status_code == 200:
             try:
                 data = response.json()
                 logger.success(f"Weather data retrieved for {city}")
-                return ExternalAPIResponse(success=True, data=data)
+                result = ExternalAPIResponse(success=True, data=data)
+                with _weather_cache_lock:
+                    _weather_cache[cache_key] = result
+                return result
             except ValueError:
                 # JSON parsing failed, fall back to mock data
                 pass
@@ -253,12 +397,15 @@ async def get_weather_data(city: str = "London") -> ExternalAPIResponse:
             "note": "This is mock data - replace with actual API key for real data"
         }
         logger.warning(f"Using mock weather data for {city} (API response: {response.status_code})")
-        return ExternalAPIResponse(success=True, data=mock_data)
+        result = ExternalAPIResponse(success=True, data=mock_data)
+        with _weather_cache_lock:
+            _weather_cache[cache_key] = result
+        return result
             
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         logger.error(f"Timeout fetching weather data for {city}")
         return ExternalAPIResponse(success=False, error="Request timeout")
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Request error: {str(e)}")
         return ExternalAPIResponse(success=False, error="Request failed")
     except Exception as e:
@@ -266,13 +413,14 @@ async def get_weather_data(city: str = "London") -> ExternalAPIResponse:
         return ExternalAPIResponse(success=False, error="Internal server error")
 
 @app.post("/external-api/webhook")
-async def handle_webhook(data: Dict[str, Any], background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+async def handle_webhook(data: Dict[str, Any], background_tasks: BackgroundTasks):
     """Handle incoming webhook data"""
     try:
         logger.info("Received webhook data")
-        
-        # Process webhook in background
-        background_tasks.add_task(process_webhook_data, data, db)
+
+        # Process webhook in background; the task opens its own session
+        # since the request-scoped one is closed once the response returns
+        background_tasks.add_task(process_webhook_data, data)
         
         return {"status": "accepted", "message": "Webhook data will be processed"}
         
@@ -280,21 +428,24 @@ async def handle_webhook(data: Dict[str, Any], background_tasks: BackgroundTasks
         logger.error(f"Error handling webhook: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to process webhook")
 
-async def process_webhook_data(data: Dict[str, Any], db: Session):
+async def process_webhook_data(data: Dict[str, Any]):
     """Background task to process webhook data"""
     try:
         logger.info("Processing webhook data in background...")
-        
+
         # Create log entry for webhook
         log_entry = LogEntry(
             level="INFO",
             message=f"Webhook processed: {data.get('type', 'unknown')}",
             source="webhook",
-            extra_data=json.dumps(data)
+            webhook_type=data.get('type'),
+            extra_data=orjson.dumps(data).decode()
         )
-        
-        db.add(log_entry)
-        db.commit()
+
+        async with SessionLocal() as db:
+            db.add(log_entry)
+            await db.commit()
+        _invalidate_analytics_cache()
         
         logger.success("Webhook data processed successfully")
         
@@ -302,39 +453,48 @@ async def process_webhook_data(data: Dict[str, Any], db: Session):
         logger.error(f"Error processing webhook data: {str(e)}")
 
 @app.get("/export/csv")
-async def export_logs_csv(db: Session = Depends(get_db)):
-    """Export logs to CSV using pandas"""
-    try:
-        logger.info("Exporting logs to CSV...")
-        
-        # Fetch logs
-        logs = db.query(LogEntry).all()
-        
-        # Convert to pandas DataFrame
-        df = pd.DataFrame([{
-            'id': log.id,
-            'timestamp': log.timestamp,
-            'level': log.level,
-            'message': log.message,
-            'source': log.source,
-            'user_id': log.user_id
-        } for log in logs])
-        
-        # Export to CSV
-        csv_filename = f"logs_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        df.to_csv(csv_filename, index=False)
-        
+async def export_logs_csv(db: AsyncSession = Depends(get_db)):
+    """Stream logs as a CSV download without materializing the table"""
+    logger.info("Exporting logs to CSV...")
+
+    csv_filename = f"logs_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+
+    async def csv_chunks():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(['id', 'timestamp', 'level', 'message', 'source', 'user_id'])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+        # Stream rows from the database in fixed-size batches so memory
+        # stays O(chunk) regardless of table size; project only the CSV
+        # columns so extra_data never crosses the wire
+        stmt = select(
+            LogEntry.id, LogEntry.timestamp, LogEntry.level,
+            LogEntry.message, LogEntry.source, LogEntry.user_id
+        ).execution_options(yield_per=10000)
+        result = await db.stream(stmt)
+        async for batch in result.partitions():
+            for log in batch:
+                writer.writerow([
+                    log.id,
+                    log.timestamp.isoformat(),
+                    log.level,
+                    log.message,
+                    log.source,
+                    log.user_id
+                ])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
         logger.success(f"Logs exported to {csv_filename}")
-        
-        return {
-            "message": "Export completed",
-            "filename": csv_filename,
-            "records_exported": len(df)
-        }
-        
-    except Exception as e:
-        logger.error(f"Error exporting logs: {str(e)}")
-        raise HTTPException(status_code=500, detail="Failed to export logs")
+
+    return StreamingResponse(
+        csv_chunks(),
+        media_type="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={csv_filename}"}
+    )
 
 @app.get("/health")
 async def health_check():